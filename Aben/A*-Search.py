@@ -1,5 +1,13 @@
+import heapq
 import math
+import os
 import sys
+from itertools import count
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from budget import BudgetExceeded, budget_from_env
+from frontier import Frontier, memory_limit_from_env, visited_set
+from reachability import ReachabilityIndex
 
 class Graph:
     def __init__(self):
@@ -7,12 +15,15 @@ class Graph:
         self.edges = {}  
         self.origin = None
         self.destinations = []
+        self.reachability = None  # ReachabilityIndex, built on first use
         
     def add_node(self, node_id, x, y):
         self.nodes[node_id] = (x, y)
+        self.reachability = None
         
     def add_edge(self, from_node, to_node, cost):
         self.edges[(from_node, to_node)] = cost
+        self.reachability = None
         
     def set_origin(self, node_id):
         self.origin = node_id
@@ -32,47 +43,360 @@ class Graph:
         x2, y2 = self.nodes[node2]
         return math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
 
-def astar_search(graph, origin, destinations):
+    def heuristic_is_admissible(self):
+        """
+        True when no edge costs less than the straight line between its ends. Only then does
+        the straight-line heuristic never overestimate, and f-scores bound the optimal cost.
+        """
+        return all(cost >= self.distance(from_node, to_node) for (from_node, to_node), cost in self.edges.items())
+
+    def goal_reachable_nodes(self, destinations):
+        """Set of nodes that can reach at least one destination, looked up once per destination set"""
+        if self.reachability is None:
+            adjacency = {node: [] for node in self.nodes}
+            for from_node, to_node in self.edges:
+                adjacency.setdefault(from_node, []).append(to_node)
+            self.reachability = ReachabilityIndex(adjacency)
+        return self.reachability.goal_reachable_nodes(destinations)
+
+def astar_search(graph, origin, destinations, memory_limit=None, budget=None):
     destination_set = set(destinations)
-    open_set = []
+    reachable = graph.goal_reachable_nodes(destinations)
+    if origin not in reachable:
+        return None, float('inf')
 
-    initial_h = min(graph.distance(origin, dest) for dest in destinations)
-    open_set.append((initial_h, origin, [origin], 0))
+    # Equal f-scores are popped in the order they were pushed, the counter keeps paths out of the comparison.
+    # Leaving the with block removes anything spilled to disk, whichever return is taken
+    with Frontier("priority", memory_limit) as open_set, visited_set(graph.nodes, memory_limit) as closed_set:
+        order = count()
 
-    closed_set = set()
-    
-    while open_set:
-        min_index = 0
-        for i in range(1, len(open_set)):
-            if open_set[i][0] < open_set[min_index][0]:
-                min_index = i
+        initial_h = min(graph.distance(origin, dest) for dest in destinations)
+        open_set.push((initial_h, next(order), origin, [origin], 0))
 
-        f_score, current_node, path, cost = open_set.pop(min_index)
+        while open_set:
+            f_score, _, current_node, path, cost = open_set.pop()
 
-        if current_node in destination_set:
-            return path, cost
+            if current_node in destination_set:
+                return path, cost
 
-        if current_node in closed_set:
-            continue
+            if current_node in closed_set:
+                continue
 
-        closed_set.add(current_node)
+            # The f-score being expanded is the lowest one left, it bounds the optimal cost from below
+            # only when the heuristic never overestimates
+            if budget is not None and budget.expand(current_node, min(graph.distance(current_node, dest) for dest in destinations)):
+                return budget.exceeded(f_score if graph.heuristic_is_admissible() else None)
 
-        neighbors = graph.get_neighbors(current_node)
+            closed_set.add(current_node)
+
+            neighbors = graph.get_neighbors(current_node)
         
-        neighbors.sort(key=lambda x: x[0])
+            neighbors.sort(key=lambda x: x[0])
         
-        for neighbor, edge_cost in neighbors:
-            if neighbor in closed_set:
-                continue
+            for neighbor, edge_cost in neighbors:
+                if neighbor in closed_set or neighbor not in reachable:
+                    continue
+
+                new_cost = cost + edge_cost
+                new_path = path + [neighbor]
+
+                h_score = min(graph.distance(neighbor, dest) for dest in destinations)
+
+                f_score = new_cost + h_score
+
+                open_set.push((f_score, next(order), neighbor, new_path, new_cost))
+
+        return None, float('inf')
+
+def ida_star_search(graph, origin, destinations, budget=None):
+    """Iterative deepening A*, only the current path is kept in memory"""
+    destination_set = set(destinations)
+    reachable = graph.goal_reachable_nodes(destinations)
+    if origin not in reachable:
+        return None, float('inf')
+
+    def heuristic(node):
+        return min(graph.distance(node, dest) for dest in destinations)
+
+    bound = heuristic(origin)
+
+    while True:
+        # Depth first search bounded by f, stack holds (node, cost, remaining neighbors)
+        path = [origin]
+        on_path = {origin}
+        stack = [(origin, 0, None)]
+        next_bound = float('inf')
+
+        while stack:
+            current_node, cost, neighbors = stack[-1]
+
+            if neighbors is None:
+                h_score = heuristic(current_node)
+                f_score = cost + h_score
+                if f_score > bound:
+                    next_bound = min(next_bound, f_score)
+                    stack.pop()
+                    on_path.discard(path.pop())
+                    continue
+
+                if current_node in destination_set:
+                    return path, cost
+
+                # Every f-score below the current bound has been searched already, which bounds
+                # the optimal cost only when the heuristic never overestimates
+                if budget is not None and budget.expand(current_node, h_score):
+                    return budget.exceeded(bound if graph.heuristic_is_admissible() else None)
+
+                neighbors = iter(sorted(graph.get_neighbors(current_node), key=lambda x: x[0]))
+                stack[-1] = (current_node, cost, neighbors)
+
+            for neighbor, edge_cost in neighbors:
+                if neighbor in on_path or neighbor not in reachable:
+                    continue
+                path.append(neighbor)
+                on_path.add(neighbor)
+                stack.append((neighbor, cost + edge_cost, None))
+                break
+            else:
+                stack.pop()
+                on_path.discard(path.pop())
+
+        if next_bound == float('inf'):
+            return None, float('inf')
+
+        bound = next_bound
+
+class SMANode:
+    # Nodes are the only thing SMA* keeps around in bulk, so they carry no per-instance __dict__
+    __slots__ = ("node_id", "parent", "index", "cost", "f_score", "depth", "successors", "next_successor",
+                 "children", "forgotten", "in_open", "alive", "serial", "version", "entries")
 
-            new_cost = cost + edge_cost
-            new_path = path + [neighbor]
+    def __init__(self, node_id, parent, index, cost, f_score, serial):
+        self.node_id = node_id
+        self.parent = parent
+        self.index = index  # position in the successor list of the parent
+        self.cost = cost
+        self.f_score = f_score
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.successors = None  # flat [neighbor, edge_cost, neighbor, edge_cost, ...] list, filled on first expansion
+        self.next_successor = 0  # index of the next successor never generated before
+        self.children = None  # child SMANodes currently in memory, None while there are none
+        self.forgotten = None  # backed up f-score of a dropped child per successor index, made on first use
+        self.in_open = True
+        self.alive = True
+        self.serial = serial  # creation order, breaks ties between equal heap keys
+        self.version = 0  # bumped on every change, heap entries with an older version are stale
+        self.entries = 0  # heap entries that still carry the current version
 
-            h_score = min(graph.distance(neighbor, dest) for dest in destinations)
+    def path(self):
+        path = []
+        node = self
+        while node is not None:
+            path.append(node.node_id)
+            node = node.parent
+        return path[::-1]
 
-            f_score = new_cost + h_score
+    def fully_generated(self):
+        return self.successors is not None and 2 * self.next_successor == len(self.successors)
 
-            open_set.append((f_score, neighbor, new_path, new_cost))
+    def has_ancestor(self, node_id):
+        node = self
+        while node is not None:
+            if node.node_id == node_id:
+                return True
+            node = node.parent
+        return False
+
+def sma_star_search(graph, origin, destinations, max_nodes=100, budget=None):
+    """
+    Simplified memory-bounded A*, the search tree never holds more than max_nodes nodes.
+    When the budget is hit the worst leaf is dropped and its f-score is backed up
+    to its parent so the subtree can be regenerated later if it becomes promising.
+    Dropped nodes are stripped straight away, and the heaps are rebuilt as soon as their
+    stale entries pass half the nodes in the tree, so memory stays proportional to max_nodes.
+    A successor is skipped when the same map node is already in memory with a cost
+    and depth that are no worse. The path is optimal whenever it fits in max_nodes nodes.
+    """
+    destination_set = set(destinations)
+    reachable = graph.goal_reachable_nodes(destinations)
+    if origin not in reachable:
+        return None, float('inf')
+
+    def heuristic(node):
+        return min(graph.distance(node, dest) for dest in destinations)
+
+    # Both heaps skip stale entries lazily: the open heap gives the lowest f-score (deepest on ties),
+    # the leaf heap the highest f-score (shallowest on ties), older nodes first after that
+    open_heap = []
+    leaf_heap = []
+    serials = count()
+    stale = 0  # heap entries whose node has moved on to a newer version
+    best_copy = {}  # map node -> cheapest search node for it currently in memory
+
+    def touch(node):
+        # Called after anything that changes the place of a node in either heap
+        nonlocal stale
+        stale += node.entries
+        node.entries = 0
+        node.version += 1
+        if not node.alive:
+            return
+        if node.in_open:
+            heapq.heappush(open_heap, (node.f_score, -node.depth, node.serial, node.version, node))
+            node.entries += 1
+        if not node.children:
+            heapq.heappush(leaf_heap, (-node.f_score, node.depth, node.serial, node.version, node))
+            node.entries += 1
+
+    def backup(node):
+        # Once every successor has been generated the f-score of a node is the best of its children
+        while node is not None and node.fully_generated():
+            values = [child.f_score for child in node.children or ()]
+            if node.forgotten:
+                values.extend(f for f in node.forgotten if f is not None)
+            best = min(values, default=float('inf'))
+            if best == node.f_score:
+                break
+            node.f_score = best
+            touch(node)
+            node = node.parent
+
+    def forget(node, remember):
+        # Detach a leaf from its parent, optionally keeping its f-score for regeneration
+        parent = node.parent
+        parent.children.remove(node)
+        if not parent.children:
+            parent.children = None
+        if remember:
+            if parent.forgotten is None:
+                parent.forgotten = [None] * (len(parent.successors) // 2)
+            parent.forgotten[node.index] = node.f_score
+        node.alive = False
+        touch(node)
+        # Stale heap entries may still point at the node until the next rebuild, so keep it small
+        node.parent = node.successors = node.children = node.forgotten = None
+        if best_copy.get(node.node_id) is node:
+            del best_copy[node.node_id]
+        parent.in_open = True
+        touch(parent)
+
+    admissible = budget is not None and graph.heuristic_is_admissible()
+    truncated = False
+
+    root = SMANode(origin, None, None, 0, heuristic(origin), next(serials))
+    best_copy[origin] = root
+    touch(root)
+    node_count = 1
+
+    while True:
+        while open_heap and open_heap[0][3] != open_heap[0][4].version:
+            heapq.heappop(open_heap)
+            stale -= 1
+        if not open_heap:
+            break
+        current = open_heap[0][4]
+
+        if current.f_score == float('inf'):
+            break
+
+        if current.node_id in destination_set:
+            return current.path(), current.cost
+
+        # current has the lowest f-score in memory, forgotten subtrees were backed up into their parents.
+        # It bounds the optimal cost from below only when the heuristic never overestimates and no
+        # path was cut off for being too long to fit in memory
+        if budget is not None and budget.expand(current.node_id, heuristic(current.node_id)):
+            return budget.exceeded(current.f_score if admissible and not truncated else None)
+
+        if current.successors is None:
+            # One flat list per node instead of a list of pairs, it is kept for as long as the node lives
+            current.successors = [
+                value
+                for neighbor, edge_cost in sorted(graph.get_neighbors(current.node_id), key=lambda x: x[0])
+                if neighbor in reachable and not current.has_ancestor(neighbor)
+                for value in (neighbor, edge_cost)
+            ]
+
+        if 2 * current.next_successor < len(current.successors):
+            index = current.next_successor
+            current.next_successor += 1
+            neighbor, edge_cost = current.successors[2 * index], current.successors[2 * index + 1]
+            new_cost = current.cost + edge_cost
+            f_score = max(current.f_score, new_cost + heuristic(neighbor))
+        elif current.forgotten:
+            index = min((i for i, f in enumerate(current.forgotten) if f is not None), key=current.forgotten.__getitem__)
+            neighbor, edge_cost = current.successors[2 * index], current.successors[2 * index + 1]
+            new_cost = current.cost + edge_cost
+            f_score = current.forgotten[index]
+            current.forgotten[index] = None
+            if not any(f is not None for f in current.forgotten):
+                current.forgotten = None
+        else:
+            current.in_open = False
+            if not current.children and current.parent is not None:
+                # Dead end, nothing below this node can reach a destination
+                current.f_score = float('inf')
+                parent = current.parent
+                forget(current, remember=False)
+                node_count -= 1
+                backup(parent)
+            else:
+                touch(current)
+            continue
+
+        child_depth = current.depth + 1
+        existing = best_copy.get(neighbor)
+        if child_depth + 1 > max_nodes or (child_depth + 1 == max_nodes and neighbor not in destination_set):
+            # The path through this child cannot fit in memory
+            truncated = True
+        elif existing is not None and existing.cost <= new_cost and existing.depth <= child_depth:
+            # The copy already in memory reaches this node at least as cheaply, this one can only do worse
+            pass
+        else:
+            if node_count >= max_nodes:
+                # Drop the shallowest leaf with the highest f-score, never the node being expanded
+                skipped = None
+                while True:
+                    entry = heapq.heappop(leaf_heap)
+                    if entry[3] != entry[4].version:
+                        stale -= 1
+                        continue
+                    entry[4].entries -= 1
+                    if entry[4] is current:
+                        skipped = entry
+                        continue
+                    break
+                if skipped is not None:
+                    heapq.heappush(leaf_heap, skipped)
+                    current.entries += 1
+                forget(entry[4], remember=True)
+                node_count -= 1
+
+            child = SMANode(neighbor, current, index, new_cost, f_score, next(serials))
+            if current.children is None:
+                current.children = []
+            current.children.append(child)
+            if existing is None or (new_cost, child_depth) < (existing.cost, existing.depth):
+                best_copy[neighbor] = child
+            node_count += 1
+            touch(child)
+            if len(current.children) == 1:
+                touch(current)  # no longer a leaf
+
+        backup(current)
+
+        if current.fully_generated() and not current.forgotten and current.children:
+            # Every successor is in memory, so the node itself no longer needs expanding
+            current.in_open = False
+            touch(current)
+
+        if 2 * stale > node_count:
+            # Stale entries pass half the nodes in the tree, rebuild both heaps from the live ones
+            open_heap[:] = [entry for entry in open_heap if entry[3] == entry[4].version]
+            leaf_heap[:] = [entry for entry in leaf_heap if entry[3] == entry[4].version]
+            heapq.heapify(open_heap)
+            heapq.heapify(leaf_heap)
+            stale = 0
 
     return None, float('inf')
 
@@ -148,8 +472,27 @@ def parse_input(input_data):
     return graph
 
 def main():
+    if len(sys.argv) < 3:
+        print("Usage: python A*-Search.py <file_name> <method> [max_nodes]")
+        return
+
     file_name = sys.argv[1]
     method = sys.argv[2]
+
+    # Node budget for SMA*, ignored by the other methods
+    max_nodes = 100
+    if len(sys.argv) > 3:
+        try:
+            max_nodes = int(sys.argv[3])
+            if max_nodes < 1:
+                print("Warning: Node budget should be >= 1. Using 100 instead.")
+                max_nodes = 100
+        except ValueError:
+            print("Warning: Invalid node budget. Using default budget of 100")
+
+    memory_limit = memory_limit_from_env()
+    budget = budget_from_env()
+
     try:
         with open(file_name, "r") as file:
             input_data = file.read()
@@ -177,8 +520,18 @@ def main():
     print(f"{file_name} {method}")
     print(f"Goal: {', '.join(map(str, graph.destinations))} \nNumber of nodes: {len(graph.nodes)}")
     
-    path, cost = astar_search(graph, graph.origin, graph.destinations)
+    if method.upper() == "IDA":
+        result = ida_star_search(graph, graph.origin, graph.destinations, budget)
+    elif method.upper() == "SMA":
+        result = sma_star_search(graph, graph.origin, graph.destinations, max_nodes, budget)
+    else:
+        result = astar_search(graph, graph.origin, graph.destinations, memory_limit, budget)
+    
+    if isinstance(result, BudgetExceeded):
+        print(result)
+        return
     
+    path, cost = result
     if path:
         print(f"Path: {' -> '.join(map(str, path))}")
         print(f"Total cost: {cost}")
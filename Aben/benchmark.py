@@ -0,0 +1,108 @@
+import importlib.util
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from budget import BudgetExceeded, SearchBudget
+
+# The search script name is not a valid module name, so load it from its path
+spec = importlib.util.spec_from_file_location("astar", os.path.join(os.path.dirname(os.path.abspath(__file__)), "A*-Search.py"))
+astar = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(astar)
+
+def generate_grid(size, seed=0):
+    """Square grid map with random obstacles, origin in one corner and the destination in the other"""
+    rng = random.Random(seed)
+    graph = astar.Graph()
+    blocked = set()
+
+    for y in range(size):
+        for x in range(size):
+            node_id = y * size + x + 1
+            graph.add_node(node_id, x, y)
+            if 0 < node_id < size * size and rng.random() < 0.2:
+                blocked.add(node_id)
+
+    for y in range(size):
+        for x in range(size):
+            node_id = y * size + x + 1
+            if node_id in blocked:
+                continue
+            for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < size and 0 <= ny < size:
+                    neighbor = ny * size + nx + 1
+                    if neighbor not in blocked:
+                        graph.add_edge(node_id, neighbor, rng.randint(1, 3))
+
+    graph.set_origin(1)
+    graph.add_destination(size * size)
+    return graph
+
+# Seconds a single run may take, IDA* and SMA* with a tight node limit blow up quickly on larger grids
+TIME_LIMIT = 5
+
+def search(method, graph, max_nodes):
+    budget = SearchBudget(timeout=TIME_LIMIT)
+    if method == "AS":
+        return astar.astar_search(graph, graph.origin, graph.destinations, budget=budget)
+    if method == "IDA":
+        return astar.ida_star_search(graph, graph.origin, graph.destinations, budget=budget)
+    return astar.sma_star_search(graph, graph.origin, graph.destinations, max_nodes, budget=budget)
+
+def run_method(method, size, max_nodes, results):
+    graph = generate_grid(size)
+
+    # method None only builds the map, its peak RSS is the baseline the searches are compared to
+    if method is None:
+        results.put((None, 0.0, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, 0))
+        return
+
+    start = time.perf_counter()
+    result = search(method, graph, max_nodes)
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    cost = "-" if isinstance(result, BudgetExceeded) else result[1]
+
+    # tracemalloc slows the search down a lot, so the traced peak comes from a second run (capped by the same time limit)
+    tracemalloc.start()
+    search(method, graph, max_nodes)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    results.put((cost, elapsed, peak_rss, traced_peak))
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [20, 30, 40]
+
+    # Every run gets a fresh interpreter so the peak RSS of one method does not leak into the next
+    context = multiprocessing.get_context("spawn")
+
+    print(f"Runs are stopped after {TIME_LIMIT} s, their cost is shown as -")
+    print(f"{'map':>7} {'method':>10} {'cost':>6} {'time (s)':>10} {'peak RSS (KB)':>14} {'over map (KB)':>14} {'traced peak (KB)':>17}")
+    for size in sizes:
+        runs = [(None, None), ("AS", None), ("IDA", None), ("SMA", size * size), ("SMA", 4 * size)]
+        baseline = None
+        for method, max_nodes in runs:
+            results = context.Queue()
+            process = context.Process(target=run_method, args=(method, size, max_nodes, results))
+            process.start()
+            cost, elapsed, peak_rss, traced_peak = results.get()
+            process.join()
+
+            if method is None:
+                baseline = peak_rss
+                print(f"{size:>3}x{size:<3} {'map only':>10} {'':>6} {'':>10} {peak_rss:>14} {'':>14} {'':>17}")
+                continue
+
+            # RSS moves in pages and varies by a few hundred KB between interpreters, the traced peak is exact
+            label = method if max_nodes is None else f"{method}({max_nodes})"
+            print(f"{size:>3}x{size:<3} {label:>10} {cost:>6} {elapsed:>10.4f} {peak_rss:>14} {peak_rss - baseline:>14} {traced_peak / 1024:>17.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,13 @@
+import math
+import os
 import sys
 import heapq
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from budget import BudgetExceeded, budget_from_env
+from frontier import Frontier, memory_limit_from_env, visited_set
+from reachability import ReachabilityIndex
+
 class Node:
     def __init__(self, node_id: int, coord: tuple):
         self.node_id = node_id
@@ -55,55 +62,86 @@ def heuristic(node, goals, nodes):
     # if no goal node can be found then return inf value 
     return min((shortest_paths[goal] for goal in goals if goal in shortest_paths), default=float('inf'))
 
-def greedy(nodes, start, goals):
-    
-    frontier = []
-    # pushes the tuple with the hueristic(distances from current node to closest goal node)
-    # it also has the start node and path taken so far 
-    # heapq.heappush method pushes the tuple with the lowest first value (the heuristic in this case) to the front of the heap
-    heapq.heappush(frontier, (heuristic(start, goals, nodes), start, [start]))  # (heuristic value, node, path)
+def goal_reachable_nodes(nodes, goals):
+    '''
+    this will return the set of nodes that can reach at least one goal node
+    it is worked out once per map on the DAG of strongly connected components
+    '''
+    adjacency = {node_id: [neighbor for neighbor, _ in node.edges] for node_id, node in nodes.items()}
+    return ReachabilityIndex(adjacency).goal_reachable_nodes(goals)
+
+def straight_line_distance(node, goals, nodes):
+    # distance in a straight line to the closest goal node, dfs has no heuristic of its own to report
+    x, y = nodes[node].coord
+    return min((math.hypot(nodes[goal].coord[0] - x, nodes[goal].coord[1] - y) for goal in goals if goal in nodes), default=float('inf'))
+
+def greedy(nodes, start, goals, reachable=None, memory_limit=None, budget=None):
+    if reachable is None:
+        reachable = goal_reachable_nodes(nodes, goals)
+    # no goal node can be reached from the start so there is no need to search
+    if start not in reachable:
+        return None
     
-    visited = set()
-
-    while frontier:
-        _, node, current_path = heapq.heappop(frontier)
+    # priority frontier, pop always returns the tuple with the lowest first value (the heuristic in this case)
+    # anything past memory_limit tuples is spilled to disk without changing that order
+    # and the spill files are removed as soon as the with block is left
+    with Frontier("priority", memory_limit) as frontier, visited_set(nodes, memory_limit) as visited:
+        # pushes the tuple with the hueristic(distances from current node to closest goal node)
+        # it also has the start node and path taken so far 
+        frontier.push((heuristic(start, goals, nodes), start, [start]))  # (heuristic value, node, path)
+
+        while frontier:
+            h, node, current_path = frontier.pop()
         
-        if node in visited:
-            continue
+            if node in visited:
+                continue
         
-        visited.add(node)
+            visited.add(node)
         
-        if node in goals:
-            return current_path
+            if node in goals:
+                return current_path
 
-        for neighbor, _ in nodes[node].edges:
-            if neighbor not in visited:
-                new_path = current_path + [neighbor]
-                heapq.heappush(frontier, (heuristic(neighbor, goals, nodes), neighbor, new_path))
+            # the heuristic says nothing about the cost of the best path, so there is no lower bound to report
+            if budget is not None and budget.expand(node, h):
+                return budget.exceeded()
+
+            for neighbor, _ in nodes[node].edges:
+                if neighbor not in visited and neighbor in reachable:
+                    new_path = current_path + [neighbor]
+                    frontier.push((heuristic(neighbor, goals, nodes), neighbor, new_path))
     
-    return None  # No path found
+        return None  # No path found
+
+def dfs(nodes, start, goals, reachable=None, memory_limit=None, budget=None):
+    if reachable is None:
+        reachable = goal_reachable_nodes(nodes, goals)
+    if start not in reachable:
+        return None
 
-def dfs(nodes, start, goals):
-    frontier = [(start, [start])]
-    visited = set()
+    # stack of (node, path), the bottom of the stack is spilled to disk past memory_limit entries
+    with Frontier("lifo", memory_limit) as frontier, visited_set(nodes, memory_limit) as visited:
+        frontier.push((start, [start]))
     
-    while frontier:
-        node, current_path = frontier.pop()
+        while frontier:
+            node, current_path = frontier.pop()
         
-        if node in visited:
-            continue
+            if node in visited:
+                continue
         
-        visited.add(node)
+            visited.add(node)
         
-        if node in goals:
-            return current_path
+            if node in goals:
+                return current_path
         
-        for neighbor, _ in nodes[node].edges:
-            if neighbor not in visited:
-                new_path = current_path + [neighbor]
-                frontier.append((neighbor, new_path))
+            if budget is not None and budget.expand(node, straight_line_distance(node, goals, nodes)):
+                return budget.exceeded()
+        
+            for neighbor, _ in nodes[node].edges:
+                if neighbor not in visited and neighbor in reachable:
+                    new_path = current_path + [neighbor]
+                    frontier.push((neighbor, new_path))
     
-    return None  # No path found
+        return None  # No path found
 
 def read_inputs(filename):
     nodes = {}
@@ -180,15 +218,22 @@ def main():
 
     nodes, origin, destinations = read_inputs(filename)
     goals = destinations  # A list of possible goal nodes
+    reachable = goal_reachable_nodes(nodes, goals)  # built once per map
+    memory_limit = memory_limit_from_env()  # max frontier entries kept in memory
+    budget = budget_from_env()  # deadline / max expansions, None when not set
 
     if method == "dfs":
-        path = dfs(nodes, origin, goals)
+        path = dfs(nodes, origin, goals, reachable, memory_limit, budget)
     elif method == "greedy":
-        path = greedy(nodes, origin, goals)
+        path = greedy(nodes, origin, goals, reachable, memory_limit, budget)
     else:
         print("Invalid method! Use 'dfs' or 'greedy'")
         return
 
+    if isinstance(path, BudgetExceeded):
+        print(path)
+        return
+
     if path:
         print(f"goal: {','.join(map(str, goals))}")
         print(f"number_of_nodes: {len(nodes)}")
@@ -0,0 +1,104 @@
+import os
+import time
+
+# The clock and the cancellation token are only looked at once every this many expansions
+CHECK_INTERVAL = 64
+
+class CancellationToken:
+    """Shared with a running search, cancel() makes it stop at its next budget check"""
+
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class BudgetExceeded:
+    """
+    Returned by a search instead of its normal result when it ran out of budget. Holds the
+    best partial information so far: the node reached closest to a goal (by the method's
+    own heuristic, or straight line distance for uninformed searches) and the current lower
+    bound on the solution cost, None when the method cannot provide one.
+    """
+
+    def __init__(self, reason, expansions, closest_node, closest_distance, lower_bound):
+        self.reason = reason
+        self.expansions = expansions
+        self.closest_node = closest_node
+        self.closest_distance = closest_distance
+        self.lower_bound = lower_bound
+
+    def __repr__(self):
+        return (f"BudgetExceeded(reason={self.reason!r}, expansions={self.expansions}, "
+                f"closest_node={self.closest_node}, closest_distance={self.closest_distance}, "
+                f"lower_bound={self.lower_bound})")
+
+    def __str__(self):
+        message = f"Budget exceeded ({self.reason}) after {self.expansions} expansions."
+        if self.closest_node is not None:
+            message += f" Closest node: {self.closest_node} (distance {self.closest_distance:g})."
+        if self.lower_bound is not None:
+            message += f" Lower bound: {self.lower_bound:g}."
+        return message
+
+class SearchBudget:
+    """
+    Limits on a single search: a wall-clock timeout in seconds, a maximum number of node
+    expansions and a CancellationToken. Any of them can be None. A budget is used up by
+    one search, make a new one for the next.
+    """
+
+    def __init__(self, timeout=None, max_expansions=None, token=None):
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.max_expansions = max_expansions
+        self.token = token
+        self.expansions = 0
+        self.next_check = 1  # check straight away in case the deadline or the token already fired
+        self.closest_node = None
+        self.closest_distance = float('inf')
+        self.reason = None
+
+    def expand(self, node=None, distance=None):
+        """Count one expansion of node (distance away from the nearest goal), True when the search has to stop instead"""
+        if distance is not None and distance < self.closest_distance:
+            self.closest_node = node
+            self.closest_distance = distance
+
+        if self.max_expansions is not None and self.expansions >= self.max_expansions:
+            self.reason = "max expansions"
+            return True
+
+        if self.expansions + 1 >= self.next_check:
+            self.next_check += CHECK_INTERVAL
+            if self.token is not None and self.token.cancelled:
+                self.reason = "cancelled"
+                return True
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                self.reason = "deadline"
+                return True
+
+        self.expansions += 1
+        return False
+
+    def exceeded(self, lower_bound=None):
+        return BudgetExceeded(self.reason, self.expansions, self.closest_node, self.closest_distance, lower_bound)
+
+def budget_from_env():
+    """Budget from SEARCH_TIMEOUT (seconds) and SEARCH_MAX_EXPANSIONS, None when neither is set"""
+    timeout = os.environ.get("SEARCH_TIMEOUT")
+    max_expansions = os.environ.get("SEARCH_MAX_EXPANSIONS")
+
+    try:
+        timeout = float(timeout) if timeout else None
+    except ValueError:
+        print(f"Warning: Invalid SEARCH_TIMEOUT '{timeout}'. Running without a deadline")
+        timeout = None
+    try:
+        max_expansions = int(max_expansions) if max_expansions else None
+    except ValueError:
+        print(f"Warning: Invalid SEARCH_MAX_EXPANSIONS '{max_expansions}'. Running without an expansion limit")
+        max_expansions = None
+
+    if timeout is None and max_expansions is None:
+        return None
+    return SearchBudget(timeout, max_expansions)
@@ -0,0 +1,255 @@
+import heapq
+import mmap
+import os
+import pickle
+import tempfile
+from collections import deque
+from itertools import count
+
+# Merge sorted runs of a priority frontier once there are more than this many open at the same time
+MAX_RUNS = 32
+
+def memory_limit_from_env():
+    """Frontier memory limit from FRONTIER_MEMORY_LIMIT, None (never spill) when it is not set"""
+    value = os.environ.get("FRONTIER_MEMORY_LIMIT")
+    if not value:
+        return None
+    try:
+        limit = int(value)
+    except ValueError:
+        print(f"Warning: Invalid FRONTIER_MEMORY_LIMIT '{value}'. Keeping the whole frontier in memory")
+        return None
+    if limit < 2:
+        print("Warning: FRONTIER_MEMORY_LIMIT should be >= 2. Using 2 instead.")
+        limit = 2
+    return limit
+
+class Frontier:
+    """
+    Search frontier that keeps at most memory_limit items in memory and spills the rest
+    to disk. order is "fifo" (BFS queue), "lifo" (DFS stack) or "priority" (smallest item
+    first, items are compared like heapq compares them). With memory_limit None nothing
+    is ever spilled. Items come back in exactly the order they would without spilling.
+    """
+
+    def __init__(self, order="fifo", memory_limit=None, spill_dir=None):
+        if order not in ("fifo", "lifo", "priority"):
+            raise ValueError(f"Unknown frontier order '{order}'")
+        self.order = order
+        self.memory_limit = memory_limit
+        self.spill_dir = spill_dir
+        self.chunk_size = None if memory_limit is None else max(1, memory_limit // 2)
+        self.size = 0
+
+        self.hot = deque() if order == "fifo" else []
+        self.tail = []  # fifo only, items pushed after the spilled runs
+        self.runs = deque()  # fifo / lifo chunk files, priority run files
+        self.run_heads = []  # priority only, heap of (smallest unread item, run id, run file)
+        self.run_ids = count()  # tie-break so two equal items never fall through to comparing files
+        self.run_sizes = {}  # priority only, run id -> items still unread in that run
+        self.temp_dir = None
+
+    def __len__(self):
+        return self.size
+
+    def __bool__(self):
+        return self.size > 0
+
+    def push(self, item):
+        self.size += 1
+
+        if self.order == "fifo":
+            # Items may only go straight to the head when nothing older is waiting on disk or in the tail
+            if self.runs or self.tail or (self.memory_limit is not None and len(self.hot) >= self.chunk_size):
+                self.tail.append(item)
+                if self.memory_limit is not None and len(self.tail) >= self.chunk_size:
+                    self.runs.append(self.write_chunk(self.tail))
+                    self.tail = []
+            else:
+                self.hot.append(item)
+
+        elif self.order == "lifo":
+            self.hot.append(item)
+            if self.memory_limit is not None and len(self.hot) > self.memory_limit:
+                # The bottom of the stack is needed last, so it goes to disk first
+                self.runs.append(self.write_chunk(self.hot[:self.chunk_size]))
+                del self.hot[:self.chunk_size]
+
+        else:
+            heapq.heappush(self.hot, item)
+            if self.memory_limit is not None and len(self.hot) > self.memory_limit:
+                self.spill_sorted_run()
+
+    def pop(self):
+        if not self.size:
+            raise IndexError("pop from an empty frontier")
+        self.size -= 1
+
+        if self.order == "fifo":
+            if not self.hot:
+                if self.runs:
+                    self.hot = deque(self.read_chunk(self.runs.popleft()))
+                else:
+                    self.hot, self.tail = deque(self.tail), []
+            return self.hot.popleft()
+
+        if self.order == "lifo":
+            if not self.hot:
+                self.hot = self.read_chunk(self.runs.pop())
+            return self.hot.pop()
+
+        if self.run_heads and (not self.hot or self.run_heads[0][0] < self.hot[0]):
+            item, run_id, run = self.run_heads[0]
+            self.run_sizes[run_id] -= 1
+            try:
+                heapq.heapreplace(self.run_heads, (pickle.load(run), run_id, run))
+            except EOFError:
+                heapq.heappop(self.run_heads)
+                del self.run_sizes[run_id]
+                run.close()
+                os.remove(run.name)
+            return item
+        return heapq.heappop(self.hot)
+
+    def close(self):
+        """Remove any spill files, the frontier must not be used afterwards"""
+        for _, _, run in self.run_heads:
+            run.close()
+        self.run_heads = []
+        self.run_sizes = {}
+        if self.temp_dir is not None:
+            self.temp_dir.cleanup()
+            self.temp_dir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def new_spill_file(self):
+        if self.temp_dir is None:
+            self.temp_dir = tempfile.TemporaryDirectory(prefix="frontier-", dir=self.spill_dir)
+        return tempfile.NamedTemporaryFile(dir=self.temp_dir.name, delete=False)
+
+    def write_chunk(self, items):
+        with self.new_spill_file() as file:
+            pickle.dump(items, file, pickle.HIGHEST_PROTOCOL)
+        return file.name
+
+    def read_chunk(self, name):
+        with open(name, "rb") as file:
+            items = pickle.load(file)
+        os.remove(name)
+        return items
+
+    def spill_sorted_run(self):
+        # Keep the best half in memory (a sorted list is already a heap) and write the rest as one sorted run
+        self.hot.sort()
+        keep = len(self.hot) - self.chunk_size
+        run = self.new_spill_file()
+        for item in self.hot[keep:]:
+            pickle.dump(item, run, pickle.HIGHEST_PROTOCOL)
+        run_id = next(self.run_ids)
+        self.run_sizes[run_id] = len(self.hot) - keep
+        del self.hot[keep:]
+        run.seek(0)
+        heapq.heappush(self.run_heads, (pickle.load(run), run_id, run))
+
+        if len(self.run_heads) > MAX_RUNS:
+            self.merge_runs()
+
+    def merge_runs(self):
+        """
+        Merge the smaller half of the sorted runs into a single one. Runs only meet others of
+        about their own size, so each item is rewritten about log(spilled items) times in
+        total instead of on every merge.
+        """
+        def read_run(head, run):
+            yield head
+            while True:
+                try:
+                    yield pickle.load(run)
+                except EOFError:
+                    run.close()
+                    os.remove(run.name)
+                    return
+
+        self.run_heads.sort(key=lambda head: self.run_sizes[head[1]])
+        merging = self.run_heads[:len(self.run_heads) // 2 + 1]
+        self.run_heads = self.run_heads[len(merging):]
+        heapq.heapify(self.run_heads)
+
+        merged = self.new_spill_file()
+        for item in heapq.merge(*(read_run(head, run) for head, _, run in merging)):
+            pickle.dump(item, merged, pickle.HIGHEST_PROTOCOL)
+        merged.seek(0)
+        run_id = next(self.run_ids)
+        self.run_sizes[run_id] = sum(self.run_sizes.pop(head_run_id) for _, head_run_id, _ in merging)
+        heapq.heappush(self.run_heads, (pickle.load(merged), run_id, merged))
+
+class VisitedBitset:
+    """
+    One bit per node id in range(size), backed by an mmap of a temporary file so the OS
+    can page it out. Works like a set (add / in) and like a bytearray of 0/1 flags.
+    """
+
+    def __init__(self, size, filled=False, spill_dir=None):
+        self.size = size
+        length = max(1, (size + 7) // 8)
+        self.file = tempfile.TemporaryFile(dir=spill_dir)
+        self.file.truncate(length)
+        if filled:
+            # Written in pieces so the fill itself never needs the whole bitset in memory
+            for start in range(0, length, 1 << 20):
+                self.file.write(b"\xff" * min(1 << 20, length - start))
+            self.file.flush()
+        self.bits = mmap.mmap(self.file.fileno(), length)
+
+    def add(self, node):
+        self.bits[node >> 3] |= 1 << (node & 7)
+
+    def discard(self, node):
+        if 0 <= node < self.size:
+            self.bits[node >> 3] &= ~(1 << (node & 7)) & 0xff
+
+    def __contains__(self, node):
+        return 0 <= node < self.size and (self.bits[node >> 3] >> (node & 7)) & 1 == 1
+
+    def __getitem__(self, node):
+        return (self.bits[node >> 3] >> (node & 7)) & 1
+
+    def __setitem__(self, node, value):
+        if value:
+            self.add(node)
+        else:
+            self.discard(node)
+
+    def close(self):
+        """Unmap the bits and delete the backing file, safe to call more than once"""
+        self.bits.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class VisitedSet(set):
+    """Plain in-memory set that can be closed and used in a with statement like VisitedBitset"""
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def visited_set(node_ids, memory_limit=None, spill_dir=None):
+    """A plain set when the frontier is unbounded, otherwise a bitset over the node ids"""
+    if memory_limit is None:
+        return VisitedSet()
+    return VisitedBitset(max(node_ids, default=0) + 1, spill_dir=spill_dir)
@@ -0,0 +1,38 @@
+import random
+import sys
+import time
+
+from frontier import Frontier
+
+# Pushing n items into a spilling priority frontier should cost about n log n, so the time per
+# item may grow a little with n but never in proportion to it
+MAX_GROWTH = 2.5
+
+def push_time(count, memory_limit, seed=0):
+    rng = random.Random(seed)
+    with Frontier("priority", memory_limit) as frontier:
+        start = time.perf_counter()
+        for i in range(count):
+            frontier.push((rng.random(), i))
+        return time.perf_counter() - start
+
+def main():
+    memory_limit = 2000
+    counts = [100000, 200000, 400000]
+    if len(sys.argv) >= 3:
+        memory_limit = int(sys.argv[1])
+        counts = [int(arg) for arg in sys.argv[2:]]
+
+    print(f"{'limit':>6} {'items':>8} {'time (s)':>9} {'us/item':>8}")
+    per_item = []
+    for count in counts:
+        elapsed = push_time(count, memory_limit)
+        per_item.append(elapsed / count)
+        print(f"{memory_limit:>6} {count:>8} {elapsed:>9.3f} {elapsed / count * 1e6:>8.2f}")
+
+    if per_item[-1] > MAX_GROWTH * per_item[0]:
+        print(f"Error: push cost per item grew {per_item[-1] / per_item[0]:.1f}x, spilling is no longer close to linear")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,12 @@
+import math
+import os
 import sys
-from collections import deque
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from budget import BudgetExceeded, budget_from_env
+from frontier import Frontier, VisitedBitset, memory_limit_from_env
+from reachability import ReachabilityIndex
 
 def parse_file(filename):
     with open(filename, 'r') as file:
@@ -37,32 +44,167 @@ def parse_file(filename):
     
     return nodes, edges, origin, destinations
 
-def bfs_search(filename):
+def goal_reachable_nodes(nodes, edges, destinations):
+    """Set of nodes that can reach at least one destination, worked out on the component DAG"""
+    adjacency = {node: [] for node in nodes}
+    for n1, neighbors in edges.items():
+        adjacency.setdefault(n1, []).extend(n2 for n2, _ in neighbors)
+    return ReachabilityIndex(adjacency).goal_reachable_nodes(destinations)
+
+def build_csr(nodes, edges, extra_nodes=()):
+    """
+    Pack the adjacency lists into CSR arrays. Node ids are renumbered 0..n-1 in
+    ascending order and every neighbor slice is sorted, so a slice read left to
+    right expands neighbors in ascending order.
+    """
+    ids = set(nodes) | set(edges) | set(extra_nodes)
+    for neighbors in edges.values():
+        ids.update(n2 for n2, _ in neighbors)
+    ids = sorted(ids)
+    position = {node: i for i, node in enumerate(ids)}
+
+    offsets = array('l', [0])
+    targets = array('l')
+    for node in ids:
+        targets.extend(sorted(position[n2] for n2, _ in edges.get(node, ())))
+        offsets.append(len(targets))
+
+    return ids, position, offsets, targets
+
+def trace_path(ids, parent, u):
+    path = [ids[u]]
+    while parent[u] != -1:
+        u = parent[u]
+        path.append(ids[u])
+    return path[::-1]
+
+def level_bfs(csr, origin, destinations, reachable, memory_limit=None, budget=None, distance_to_goal=None):
+    """
+    BFS over CSR arrays, one level at a time. Returns (path, edges traversed), path is None
+    when no destination can be reached. Without NumPy every edge is still visited by a
+    Python loop, so this is a plain BFS with a visited bitmap and a parent array instead of
+    a queue of copied paths. Parents are assigned exactly as a FIFO queue
+    expanding neighbors in ascending order would, so the path matches the classic BFS.
+    When budget runs out a BudgetExceeded is returned instead, its lower bound counts edges.
+    """
+    if memory_limit is not None:
+        return spilling_bfs(csr, origin, destinations, reachable, memory_limit, budget, distance_to_goal)
+
+    ids, position, offsets, targets = csr
+    n = len(ids)
+
+    # Nodes that cannot reach a destination start out visited so they are never expanded
+    visited = bytearray(b'\x01') * n
+    for node in reachable:
+        visited[position[node]] = 0
+
+    is_goal = bytearray(n)
+    for node in destinations:
+        if node in position:
+            is_goal[position[node]] = 1
+
+    parent = array('l', [-1]) * n
+    start = position[origin]
+    visited[start] = 1
+    frontier = [start]
+    edges_traversed = 0
+    level = 0
+
+    while frontier:
+        for u in frontier:
+            if is_goal[u]:
+                return trace_path(ids, parent, u), edges_traversed
+            # No destination was found on an earlier level, so any path needs at least level edges
+            if budget is not None and budget.expand(ids[u], distance_to_goal(ids[u]) if distance_to_goal else None):
+                return budget.exceeded(level)
+
+        # Scan the neighbor slice of each frontier node, in frontier order
+        next_frontier = []
+        for u in frontier:
+            lo, hi = offsets[u], offsets[u + 1]
+            edges_traversed += hi - lo
+            for v in targets[lo:hi]:
+                if not visited[v]:
+                    visited[v] = 1
+                    parent[v] = u
+                    next_frontier.append(v)
+
+        frontier = next_frontier
+        level += 1
+
+    return None, edges_traversed
+
+def spilling_bfs(csr, origin, destinations, reachable, memory_limit, budget=None, distance_to_goal=None):
+    """
+    level_bfs for frontiers that do not fit in memory. The queue spills to disk past
+    memory_limit nodes and the visited flags live in an mmap backed bitset.
+    """
+    ids, position, offsets, targets = csr
+    n = len(ids)
+
+    # Both the bitset and the queue release their files when the with block is left, on every return
+    with VisitedBitset(n, filled=True) as visited, Frontier("fifo", memory_limit) as queue:
+        for node in reachable:
+            visited[position[node]] = 0
+
+        is_goal = bytearray(n)
+        for node in destinations:
+            if node in position:
+                is_goal[position[node]] = 1
+
+        parent = array('l', [-1]) * n
+        start = position[origin]
+        visited[start] = 1
+        queue.push(start)
+        edges_traversed = 0
+
+        while queue:
+            u = queue.pop()
+            if is_goal[u]:
+                return trace_path(ids, parent, u), edges_traversed
+            if budget is not None and budget.expand(ids[u], distance_to_goal(ids[u]) if distance_to_goal else None):
+                return budget.exceeded()
+
+            lo, hi = offsets[u], offsets[u + 1]
+            edges_traversed += hi - lo
+            for v in targets[lo:hi]:
+                if not visited[v]:
+                    visited[v] = 1
+                    parent[v] = u
+                    queue.push(v)
+
+        return None, edges_traversed
+
+def bfs_search(filename, memory_limit=None, budget=None):
     nodes, edges, origin, destinations = parse_file(filename)
-    
-    queue = deque([(origin, [origin])])  # (current node, path)
-    visited = set()
-    created_nodes = 1  # Count the origin node
+    reachable = goal_reachable_nodes(nodes, edges, destinations)
     
     print(f"{filename} BFS")
     print(f"Goal: {', '.join(map(str, destinations))}")
     print(f"Number of nodes: {len(nodes)}")
     
-    while queue:
-        node, path = queue.popleft()
-        if node in visited:
-            continue
-        visited.add(node)
-        
-        if node in destinations:
-            print(f"Path: {' -> '.join(map(str, path))}")
-            return
-        
-        if node in edges:
-            for neighbor, _ in sorted(edges[node]):  # Expand in ascending order
-                if neighbor not in visited:
-                    created_nodes += 1
-                    queue.append((neighbor, path + [neighbor]))
+    if origin not in reachable:
+        print("No path found to any destination!")
+        return
+    
+    def distance_to_goal(node):
+        # Straight line distance to the nearest destination, reported when the budget runs out
+        if node not in nodes:
+            return None
+        x, y = nodes[node]
+        return min((math.hypot(nodes[d][0] - x, nodes[d][1] - y) for d in destinations if d in nodes), default=None)
+    
+    csr = build_csr(nodes, edges, [origin, *destinations])
+    result = level_bfs(csr, origin, destinations, reachable, memory_limit, budget, distance_to_goal)
+    
+    if isinstance(result, BudgetExceeded):
+        print(result)
+        return
+    
+    path, _ = result
+    if path:
+        print(f"Path: {' -> '.join(map(str, path))}")
+        return
 
     print("No path found to any destination!")
 
@@ -78,4 +220,4 @@ if __name__ == "__main__":
         print(f"Error: Method '{method}' not supported. Only 'bfs' is currently implemented.")
         sys.exit(1)
     
-    bfs_search(filename)
+    bfs_search(filename, memory_limit_from_env(), budget_from_env())
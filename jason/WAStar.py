@@ -1,5 +1,12 @@
 import math
+import os
 import sys
+from itertools import count
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from budget import BudgetExceeded, budget_from_env
+from frontier import Frontier, memory_limit_from_env, visited_set
+from reachability import ReachabilityIndex
 
 class Graph:
     def __init__(self):
@@ -7,12 +14,15 @@ class Graph:
         self.edges = {}  
         self.origin = None
         self.destinations = []
+        self.reachability = None  # ReachabilityIndex, built on first use
         
     def add_node(self, node_id, x, y):
         self.nodes[node_id] = (x, y)
+        self.reachability = None
         
     def add_edge(self, from_node, to_node, cost):
         self.edges[(from_node, to_node)] = cost
+        self.reachability = None
         
     def set_origin(self, node_id):
         self.origin = node_id
@@ -32,51 +42,75 @@ class Graph:
         x2, y2 = self.nodes[node2]
         return math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
 
-def weighted_astar_search(graph, origin, destinations, weight=1.0):
+    def heuristic_is_admissible(self):
+        """
+        True when no edge costs less than the straight line between its ends. Only then does
+        the straight-line heuristic never overestimate, and f-scores bound the optimal cost.
+        """
+        return all(cost >= self.distance(from_node, to_node) for (from_node, to_node), cost in self.edges.items())
+
+    def goal_reachable_nodes(self, destinations):
+        """Set of nodes that can reach at least one destination, looked up once per destination set"""
+        if self.reachability is None:
+            adjacency = {node: [] for node in self.nodes}
+            for from_node, to_node in self.edges:
+                adjacency.setdefault(from_node, []).append(to_node)
+            self.reachability = ReachabilityIndex(adjacency)
+        return self.reachability.goal_reachable_nodes(destinations)
+
+def weighted_astar_search(graph, origin, destinations, weight=1.0, memory_limit=None, budget=None):
     destination_set = set(destinations)
-    open_set = []
+    reachable = graph.goal_reachable_nodes(destinations)
+    if origin not in reachable:
+        return None, float('inf')
+
+    # Lowest f-score first, equal f-scores in the order they were pushed. Spill files are
+    # removed when the with block is left
+    with Frontier("priority", memory_limit) as open_set, visited_set(graph.nodes, memory_limit) as closed_set:
+        order = count()
     
-    # Track visited nodes and their best known costs
-    g_scores = {origin: 0}
+        # Track visited nodes and their best known costs
+        g_scores = {origin: 0}
     
-    initial_h = min(graph.distance(origin, dest) for dest in destinations)
-    open_set.append((weight * initial_h, origin, [origin], 0))  # f, node, path, g
+        initial_h = min(graph.distance(origin, dest) for dest in destinations)
+        open_set.push((weight * initial_h, next(order), origin, [origin], 0))  # f, order, node, path, g
 
-    closed_set = set()
-    
-    while open_set:
-        # Sort by f-score to easily get the minimum
-        open_set.sort(key=lambda x: x[0])
-        f_score, current_node, path, cost = open_set.pop(0)
+        while open_set:
+            f_score, _, current_node, path, cost = open_set.pop()
 
-        if current_node in destination_set:
-            return path, cost
+            if current_node in destination_set:
+                return path, cost
 
-        if current_node in closed_set:
-            continue
+            if current_node in closed_set:
+                continue
+
+            # With an admissible heuristic the smallest weighted f-score left is at most weight times the
+            # optimal cost, so f / weight bounds it from below. Otherwise there is no bound to report
+            if budget is not None and budget.expand(current_node, min(graph.distance(current_node, dest) for dest in destinations)):
+                return budget.exceeded(f_score / weight if graph.heuristic_is_admissible() else None)
 
-        closed_set.add(current_node)
+            closed_set.add(current_node)
 
-        neighbors = graph.get_neighbors(current_node)
+            neighbors = graph.get_neighbors(current_node)
         
-        for neighbor, edge_cost in neighbors:
-            if neighbor in closed_set:
-                continue
+            for neighbor, edge_cost in neighbors:
+                if neighbor in closed_set or neighbor not in reachable:
+                    continue
 
-            tentative_g = cost + edge_cost
+                tentative_g = cost + edge_cost
             
-            # Only consider this path if it's better than any existing path to neighbor
-            if neighbor in g_scores and tentative_g >= g_scores[neighbor]:
-                continue
+                # Only consider this path if it's better than any existing path to neighbor
+                if neighbor in g_scores and tentative_g >= g_scores[neighbor]:
+                    continue
                 
-            g_scores[neighbor] = tentative_g
-            new_path = path + [neighbor]
-            h_score = min(graph.distance(neighbor, dest) for dest in destinations)
-            f_score = tentative_g + weight * h_score
+                g_scores[neighbor] = tentative_g
+                new_path = path + [neighbor]
+                h_score = min(graph.distance(neighbor, dest) for dest in destinations)
+                f_score = tentative_g + weight * h_score
 
-            open_set.append((f_score, neighbor, new_path, tentative_g))
+                open_set.push((f_score, next(order), neighbor, new_path, tentative_g))
 
-    return None, float('inf')
+        return None, float('inf')
 
 # [Rest of the code remains the same...]
 
@@ -170,6 +204,9 @@ def main():
         except ValueError:
             print("Warning: Invalid weight value. Using default weight of 1.0")
     
+    memory_limit = memory_limit_from_env()
+    budget = budget_from_env()
+    
     try:
         with open(file_name, "r") as file:
             input_data = file.read()
@@ -197,8 +234,13 @@ def main():
     print(f"{file_name} {method} (weight={weight})")
     print(f"Goal: {', '.join(map(str, graph.destinations))} \nNumber of nodes: {len(graph.nodes)}")
     
-    path, cost = weighted_astar_search(graph, graph.origin, graph.destinations, weight)
+    result = weighted_astar_search(graph, graph.origin, graph.destinations, weight, memory_limit, budget)
+    
+    if isinstance(result, BudgetExceeded):
+        print(result)
+        return
     
+    path, cost = result
     if path:
         print(f"Path: {' -> '.join(map(str, path))}")
         print(f"Total cost: {cost}")
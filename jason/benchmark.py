@@ -0,0 +1,73 @@
+import random
+import sys
+import time
+from collections import deque
+
+from BFS import build_csr, goal_reachable_nodes, level_bfs
+
+def queue_bfs(edges, origin, destinations, reachable):
+    """The original one node at a time BFS, kept as the baseline to compare against"""
+    queue = deque([(origin, [origin])])
+    visited = set()
+    edges_traversed = 0
+
+    while queue:
+        node, path = queue.popleft()
+        if node in visited:
+            continue
+        visited.add(node)
+
+        if node in destinations:
+            return path, edges_traversed
+
+        if node in edges:
+            edges_traversed += len(edges[node])
+            for neighbor, _ in sorted(edges[node]):
+                if neighbor not in visited and neighbor in reachable:
+                    queue.append((neighbor, path + [neighbor]))
+
+    return None, edges_traversed
+
+def generate_map(node_count, degree, seed=0):
+    """Random directed map with roughly degree outgoing edges per node"""
+    rng = random.Random(seed)
+    nodes = {i: (rng.randint(0, 1000), rng.randint(0, 1000)) for i in range(1, node_count + 1)}
+    edges = {}
+    for i in nodes:
+        for _ in range(degree):
+            edges.setdefault(i, []).append((rng.randint(1, node_count), rng.randint(1, 10)))
+    return nodes, edges
+
+def main():
+    runs = [(20000, 3), (20000, 16), (100000, 4), (50000, 40)]
+    if len(sys.argv) == 3:
+        runs = [(int(sys.argv[1]), int(sys.argv[2]))]
+
+    # Throughput is edges traversed per second. The two methods do not scan the same edges (the
+    # queue also expands part of the goal's level before reaching the goal), so the speedup on
+    # wall time for the same query is shown next to it
+    print("edges: queue counts the goal's level up to the goal, level stops before that level")
+    print(f"{'nodes':>8} {'degree':>6} {'method':>6} {'edges':>10} {'time (s)':>9} {'edges/s':>12} {'speedup':>8}")
+    for node_count, degree in runs:
+        nodes, edges = generate_map(node_count, degree)
+        origin = 1
+        destinations = {node_count}  # random far away node, usually found late
+        reachable = goal_reachable_nodes(nodes, edges, destinations)
+
+        start = time.perf_counter()
+        expected, traversed = queue_bfs(edges, origin, destinations, reachable)
+        baseline = time.perf_counter() - start
+        print(f"{node_count:>8} {degree:>6} {'queue':>6} {traversed:>10} {baseline:>9.4f} {traversed / baseline:>12.0f} {1:>8.2f}")
+
+        csr = build_csr(nodes, edges, [origin, *destinations])
+        start = time.perf_counter()
+        path, traversed = level_bfs(csr, origin, destinations, reachable)
+        elapsed = time.perf_counter() - start
+        print(f"{node_count:>8} {degree:>6} {'level':>6} {traversed:>10} {elapsed:>9.4f} {traversed / elapsed:>12.0f} {baseline / elapsed:>8.2f}")
+
+        if path != expected:
+            print("Error: level-synchronous BFS found a different path")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+def strongly_connected_components(adjacency):
+    """
+    Tarjan's algorithm without recursion, adjacency maps every node to its neighbors.
+    Components come out in reverse topological order, so every edge of the condensation
+    points to a component that was found earlier.
+    """
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    components = []
+
+    for root in adjacency:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(adjacency[root]))]
+
+        while work:
+            node, neighbors = work[-1]
+            for neighbor in neighbors:
+                if neighbor not in index:
+                    index[neighbor] = lowlink[neighbor] = len(index)
+                    stack.append(neighbor)
+                    on_stack.add(neighbor)
+                    work.append((neighbor, iter(adjacency[neighbor])))
+                    break
+                if neighbor in on_stack:
+                    lowlink[node] = min(lowlink[node], index[neighbor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+    return components
+
+class ReachabilityIndex:
+    """
+    Condensation of a map into its strongly connected components, built once. Answers which
+    nodes can reach a set of destinations with one pass over the components, and remembers
+    the answer for every destination set it was asked about.
+    """
+
+    def __init__(self, adjacency):
+        # Neighbors that never appear as a key still need a (neighborless) entry of their own
+        self.adjacency = {node: list(neighbors) for node, neighbors in adjacency.items()}
+        for neighbors in list(self.adjacency.values()):
+            for neighbor in neighbors:
+                self.adjacency.setdefault(neighbor, [])
+
+        self.components = strongly_connected_components(self.adjacency)
+        component_of = {node: i for i, component in enumerate(self.components) for node in component}
+        self.component_successors = [
+            {component_of[neighbor] for node in component for neighbor in self.adjacency[node]} - {i}
+            for i, component in enumerate(self.components)
+        ]
+        self.cache = {}
+
+    def goal_reachable_nodes(self, destinations):
+        """Set of nodes that can reach at least one of destinations"""
+        key = frozenset(destinations)
+        if key not in self.cache:
+            # Successor components always come first, so one pass over the condensation is enough
+            reaches_goal = []
+            for i, component in enumerate(self.components):
+                reaches_goal.append(
+                    any(node in key for node in component)
+                    or any(reaches_goal[successor] for successor in self.component_successors[i])
+                )
+            self.cache[key] = {
+                node for i, component in enumerate(self.components) if reaches_goal[i] for node in component
+            }
+        return self.cache[key]
@@ -1,13 +1,20 @@
+import math
+import os
 import re
 import sys
 from collections import defaultdict
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from budget import BudgetExceeded, budget_from_env
+from reachability import ReachabilityIndex
+
 class Graph:
     def __init__(self):
         self.nodes = {}  # Node positions
         self.edges = defaultdict(dict)  # Adjacency list for edges
         self.origin = None
         self.destinations = []
+        self.reachable = None  # Nodes that can reach a destination, built once per map
 
     def load_from_file(self, filename):
         with open(filename, 'r') as file:
@@ -37,7 +44,21 @@ class Graph:
         if destination_section:
             self.destinations = list(map(int, destination_section.group(1).split(';')))
 
-    def dls(self, node, depth, visited, path, cost):
+    def build_reachability_index(self):
+        # Nodes that can reach a destination, worked out once on the component DAG
+        adjacency = {node: list(self.edges.get(node, {})) for node in self.nodes}
+        for start, ends in list(self.edges.items()):
+            adjacency.setdefault(start, list(ends))
+        self.reachable = ReachabilityIndex(adjacency).goal_reachable_nodes(self.destinations)
+
+    def distance_to_goal(self, node):
+        # Straight line distance to the closest destination, only used to report progress
+        if node not in self.nodes:
+            return None
+        x, y = self.nodes[node]
+        return min((math.hypot(self.nodes[d][0] - x, self.nodes[d][1] - y) for d in self.destinations if d in self.nodes), default=None)
+
+    def dls(self, node, depth, visited, path, cost, budget=None):
         if depth < 0:
             return None, len(visited), [], 0
 
@@ -47,23 +68,37 @@ class Graph:
         if node in self.destinations:
             return node, len(visited), list(path), cost
 
+        # Out of budget, unwind without a goal and let iddfs report it
+        if budget is not None and budget.expand(node, self.distance_to_goal(node)):
+            return None, len(visited), [], 0
+
         for neighbor, edge_cost in sorted(self.edges[node].items()):
-            if neighbor not in visited:
-                result = self.dls(neighbor, depth - 1, visited, path, cost + edge_cost)
-                if result[0] is not None:
+            if neighbor not in visited and neighbor in self.reachable:
+                result = self.dls(neighbor, depth - 1, visited, path, cost + edge_cost, budget)
+                if result[0] is not None or (budget is not None and budget.reason is not None):
                     return result
 
         path.pop()
         return None, len(visited), [], 0
 
-    def iddfs(self):
+    def iddfs(self, budget=None):
+        if self.reachable is None:
+            self.build_reachability_index()
+
+        # No destination can be reached, deepening forever would never find one
+        if self.origin not in self.reachable:
+            return None, 0, [], 0
+
         depth = 0
         while True:
             visited = set()
             path = []
-            goal, node_count, found_path, cost = self.dls(self.origin, depth, visited, path, 0)
+            goal, node_count, found_path, cost = self.dls(self.origin, depth, visited, path, 0, budget)
             if goal is not None:
                 return goal, node_count, found_path, cost
+            # The shared visited set can skip shorter paths, so the depth reached is not a lower bound
+            if budget is not None and budget.reason is not None:
+                return budget.exceeded()
             depth += 1
 
     def __str__(self):
@@ -82,8 +117,11 @@ if __name__ == "__main__":
     graph.load_from_file(filename)
 
     if method == "IDDFS":
-        goal, node_count, path, cost = graph.iddfs()
-        if goal is not None:
+        result = graph.iddfs(budget_from_env())
+        if isinstance(result, BudgetExceeded):
+            print(result)
+        elif result[0] is not None:
+            goal, node_count, path, cost = result
             print(f"Goal: {goal}")
             print(f"Number of Nodes Visited: {node_count}")
             print(f"Path: {path}")